@@ -1,10 +1,32 @@
-import json
+import hashlib
+import orjson
 import os
 import logging
+import pickle
+import tempfile
+from datetime import date
 import marshmallow_dataclass
+from deepfriedmarshmallow import JitSchema
 from marshmallow import ValidationError
 from data_classes import Agency, Signature, TaxCertificateTemplate
 
+# Marshmallow schemas are generated once and reused for every load.
+# JitSchema compiles the load method on first use, so the compiled code is shared too.
+_AGENCY_SCHEMA = marshmallow_dataclass.class_schema(Agency, base_schema=JitSchema)()
+_SIGNATURE_SCHEMA = marshmallow_dataclass.class_schema(
+    Signature, base_schema=JitSchema
+)()
+
+# Directory for data cached between runs
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "fiscale-attesten")
+TEMPLATE_CACHE_PATH = os.path.join(CACHE_DIRECTORY, "tax_certificate_template.pickle")
+# Part of the template data cache key: increase when the data classes or schemas change
+TEMPLATE_CACHE_VERSION = 1
+TEMPLATE_DOCUMENT_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "templates")
+# Part of the generated template cache key: increase when word_export or utils change
+# what is written to the template
+TEMPLATE_DOCUMENT_CACHE_VERSION = 1
+
 
 def load_config(file_path: str = "config.json") -> dict:
     """
@@ -22,25 +44,25 @@ def load_config(file_path: str = "config.json") -> dict:
         PermissionError: If the program lacks permissions to read the file.
         OSError: For other OS-related errors (e.g., issues opening the file).
     """
-    logging.debug(f"Attempting to load config file from {file_path}")
+    logging.debug("Attempting to load config file from %s", file_path)
     if not os.path.exists(file_path):
         error_msg = f"Configuration file not found: {file_path}"
         logging.error(error_msg)
         raise FileNotFoundError(error_msg)
 
     try:
-        with open(file_path, "r") as file:
-            config = json.load(file)
-            logging.debug(f"Config successfully loaded from {file_path}")
+        with open(file_path, "rb") as file:
+            config = orjson.loads(file.read())
+            logging.debug("Config successfully loaded from %s", file_path)
             return config
-    except json.JSONDecodeError as e:
-        logging.error(f"Error decoding JSON from {file_path}: {e.msg}")
+    except orjson.JSONDecodeError as e:
+        logging.error("Error decoding JSON from %s: %s", file_path, e.msg)
         raise
     except PermissionError as e:
-        logging.error(f"Permission denied when trying to read the file: {file_path}")
+        logging.error("Permission denied when trying to read the file: %s", file_path)
         raise
     except OSError as e:
-        logging.error(f"Error opening or reading the file {file_path}: {e.strerror}")
+        logging.error("Error opening or reading the file %s: %s", file_path, e.strerror)
         raise
 
 
@@ -57,7 +79,7 @@ def save_config(config: dict, file_path: str = "src\\config.json") -> None:
         PermissionError: If the program lacks permissions to write to the file.
         OSError: For other OS-related errors (e.g., issues opening the file).
     """
-    logging.debug(f"Saving config to {file_path}")
+    logging.debug("Saving config to %s", file_path)
     if not isinstance(config, dict):
         error_msg = "Invalid config format; expected a dictionary."
         logging.error(error_msg)
@@ -67,16 +89,16 @@ def save_config(config: dict, file_path: str = "src\\config.json") -> None:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-        with open(file_path, "w") as file:
-            json.dump(config, file, indent=4)
-        logging.debug(f"Config successfully saved to {file_path}")
+        with open(file_path, "wb") as file:
+            file.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        logging.debug("Config successfully saved to %s", file_path)
     except PermissionError as e:
         logging.error(
-            f"Permission denied when trying to write to the file: {file_path}"
+            "Permission denied when trying to write to the file: %s", file_path
         )
         raise
     except OSError as e:
-        logging.error(f"Error writing to the file {file_path}: {e.strerror}")
+        logging.error("Error writing to the file %s: %s", file_path, e.strerror)
         raise
 
 
@@ -101,13 +123,11 @@ def read_agency(config_data: dict):
         raise TypeError(error_msg)
 
     try:
-        # Generate Marshmallow schema for the Agency class
-        AgencySchema = marshmallow_dataclass.class_schema(Agency)
-        agency: Agency = AgencySchema().load(config_data)
+        agency: Agency = _AGENCY_SCHEMA.load(config_data)
         logging.debug("Succesfully loaded and converted agency data.")
         return agency
     except ValidationError as e:
-        logging.error(f"Invalid agency configuration data: {e.messages}")
+        logging.error("Invalid agency configuration data: %s", e.messages)
         raise
 
 
@@ -132,13 +152,11 @@ def read_signature(config_data: dict):
         raise TypeError(error_msg)
 
     try:
-        # Generate Marshmallow schema for the Signature class
-        SignatureSchema = marshmallow_dataclass.class_schema(Signature)
-        signature: Signature = SignatureSchema().load(config_data)
+        signature: Signature = _SIGNATURE_SCHEMA.load(config_data)
         logging.debug("Succesfully loaded and converted signature data.")
         return signature
     except ValidationError as e:
-        logging.error(f"Invalid signature configuration data: {e.messages}")
+        logging.error("Invalid signature configuration data: %s", e.messages)
         raise
 
 
@@ -174,10 +192,74 @@ def read_tax_certificate_template_data(user_config: dict):
         logging.debug("Succesfully loaded and converted Tax Certificate template data.")
         return template
     except KeyError as e:
-        logging.error(f"Missing required configuration key: {e}")
+        logging.error("Missing required configuration key: %s", e)
         raise
 
 
+def read_cached_tax_certificate_template_data(
+    user_config: dict, cache_path: str = TEMPLATE_CACHE_PATH
+):
+    """
+    Reads the tax certificate template data, reusing the result of a previous run if the
+    user configuration hasn't changed since.
+
+    The cache key is a hash of the user configuration, today's date, since the signature
+    date defaults to the current date, and `TEMPLATE_CACHE_VERSION`.
+
+    Args:
+        user_config (dict): The dictionary containing the configuration data.
+        cache_path (str): Path of the pickle file holding the cached template data.
+
+    Returns:
+        TaxCertificateTemplate: The cached or freshly read template data.
+
+    Raises:
+        KeyError: If any required key is missing in the `user_config`.
+        TypeError: If the provided `user_config` is not a dictionary.
+    """
+    key = hashlib.sha256(orjson.dumps(user_config, option=orjson.OPT_SORT_KEYS))
+    key.update(date.today().isoformat().encode())
+    # The cached data is only valid for the data classes and schemas it was read with
+    key.update(str(TEMPLATE_CACHE_VERSION).encode())
+    config_hash = key.hexdigest()
+
+    try:
+        with open(cache_path, "rb") as file:
+            cached_hash, template = pickle.load(file)
+        if cached_hash == config_hash:
+            logging.debug(
+                "Using cached Tax Certificate template data from %s", cache_path
+            )
+            return template
+    except (
+        OSError,
+        pickle.UnpicklingError,
+        EOFError,
+        AttributeError,
+        TypeError,
+        ValueError,
+    ):
+        pass  # No usable cache, read the template data below
+
+    template: TaxCertificateTemplate = read_tax_certificate_template_data(user_config)
+
+    try:
+        cache_directory = os.path.dirname(cache_path)
+        os.makedirs(cache_directory, exist_ok=True)
+        # Written under a temporary name first, so an interrupted write leaves no partial cache
+        file_descriptor, temporary_file_name = tempfile.mkstemp(dir=cache_directory)
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump((config_hash, template), file)
+            os.replace(temporary_file_name, cache_path)
+        except OSError:
+            os.remove(temporary_file_name)
+            raise
+    except OSError as e:
+        logging.warning("Could not cache Tax Certificate template data: %s", e.strerror)
+    return template
+
+
 def read_age_group_data(user_config: dict):
     """
     Reads the age group data and the first registration year from the user configuration.
@@ -206,5 +288,5 @@ def read_age_group_data(user_config: dict):
         logging.debug("Succesfully loaded age group data.")
         return age_group_config_data, first_registration_year
     except KeyError as e:
-        logging.error(f"Missing required configuration key: {e}")
+        logging.error("Missing required configuration key: %s", e)
         raise
@@ -1,10 +1,44 @@
+import csv
 import logging
-import pandas as pd
 
 from data_classes import Activity
 from utils import parse_date
 
 
+def read_csv_rows(csv_file: str) -> list:
+    """
+    Reads a CSV file into a list of rows, each row being a list of cell values (strings).
+    Blank lines are skipped and every row is padded with empty cells to the width of the header row.
+
+    Args:
+        csv_file (str): The path to the CSV file.
+
+    Returns:
+        list: The rows of the CSV file.
+
+    Raises:
+        FileNotFoundError: If the CSV file cannot be found at the provided path.
+        ValueError: If the CSV file is empty.
+    """
+    try:
+        with open(csv_file, newline="", encoding="utf-8-sig") as file:
+            rows = [row for row in csv.reader(file) if row]
+    except FileNotFoundError:
+        logging.error("Error: CSV file '%s' not found.", csv_file)
+        raise  # Re-raise the exception after logging the error
+
+    if not rows:
+        error_msg = f"Error: CSV file '{csv_file}' is empty."
+        logging.error(error_msg)
+        raise ValueError(error_msg)
+
+    width = len(rows[0])
+    for row in rows:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+    return rows
+
+
 def read_activity_data(csv_file: str) -> dict:
     """
     Reads activity data from a CSV file and returns it as a dictionary.
@@ -23,7 +57,7 @@ def read_activity_data(csv_file: str) -> dict:
         TypeError: If the `csv_file` argument is not a string.
         Warning: Logs a warning if any required field for an activity (start date, end date, or price) is missing.
     """
-    logging.debug(f"Reading activity data from {csv_file}")
+    logging.debug("Reading activity data from %s", csv_file)
 
     if not isinstance(csv_file, str):
         raise TypeError(
@@ -31,77 +65,64 @@ def read_activity_data(csv_file: str) -> dict:
         )
 
     ROW_INCREMENT = 3
-    # Read the CSV file into a pandas DataFrame
-    try:
-        csv_data = pd.read_csv(csv_file, header=None)
-    except FileNotFoundError | pd.errors.EmptyDataError:
-        logging.error(f"Error: CSV file '{csv_file}' not found.")
-        raise  # Re-raise the exception after logging the error
+    # Read the CSV file into a list of rows
+    cells = read_csv_rows(csv_file)
 
     # Initialize the activity data dictionary
     activity_data = {}
 
     # Extract column headers (activities) from the second row (index 0), skipping the first column (group names)
-    activities = csv_data.iloc[0, 1:].tolist()
-    logging.debug(f"Activities found: {activities}")
+    activities = cells[0][1:]
+    logging.debug("Activities found: %s", activities)
 
     # Iterate through the groups and activities
     for row in range(
-        1, len(csv_data), ROW_INCREMENT
+        1, len(cells), ROW_INCREMENT
     ):  # Step by 3 rows (start date, end date, and price)
-        age_group_name = csv_data.iloc[row, 0]  # Group name is in the first column
+        start_date_row = cells[row]
+        age_group_name = start_date_row[0]  # Group name is in the first column
 
-        if pd.isna(age_group_name):
+        if not age_group_name:
             continue  # Skip rows with no group name
 
+        end_date_row = cells[row + 1]
+        price_row = cells[row + 2]
+
         # Initialize the data structure for the group
-        activity_data[age_group_name.lower()] = {}
+        age_group_activities = activity_data[age_group_name.lower()] = {}
 
         # Iterate over each activity and populate the dictionary
-        for index, activity_name in enumerate(activities):
-            col = index + 1
-            if pd.isna(activity_name):
+        for col, activity_name in enumerate(activities, 1):
+            if not activity_name:
                 continue  # Skip if there's no activity name in the column
 
             try:
                 # Get the start date, end date, and price for the current activity directly
-                start_date = (
-                    csv_data.iloc[row, col]
-                    if not pd.isna(csv_data.iloc[row, col])
-                    else None
-                )
-                end_date = (
-                    csv_data.iloc[row + 1, col]
-                    if not pd.isna(csv_data.iloc[row + 1, col])
-                    else None
-                )
-                price = (
-                    csv_data.iloc[row + 2, col]
-                    if not pd.isna(csv_data.iloc[row + 2, col])
-                    else None
-                )
+                start_date = start_date_row[col]
+                end_date = end_date_row[col]
+                price = price_row[col]
 
-                if start_date is None or end_date is None or price is None:
+                if not start_date or not end_date or not price:
                     logging.warning(
-                        f"Missing activity data for age group: {age_group_name} and activity: {activity_name}"
+                        "Missing activity data for age group: %s and activity: %s",
+                        age_group_name,
+                        activity_name,
                     )
                     continue  # Skip this row if any critical field is empty
 
                 # Add an Activity object to the dictionary
-                activity_data[age_group_name.lower()][activity_name.lower()] = Activity(
+                age_group_activities[activity_name.lower()] = Activity(
                     parse_date(start_date), parse_date(end_date), float(price)
                 )
 
             except ValueError as e:
                 logging.error(
-                    f"Error parsing activity data for {activity_name} in age group {age_group_name}: {e}"
+                    "Error parsing activity data for %s in age group %s: %s",
+                    activity_name,
+                    age_group_name,
+                    e,
                 )
                 raise  # Raise a ValueError if parsing fails
-            except Exception as e:
-                logging.error(
-                    f"Unexpected error for activity '{activity_name}' in group '{age_group_name}': {e}"
-                )
-                raise  # Raise any other unexpected errors
 
     return activity_data
 
@@ -121,6 +142,7 @@ def read_presence_data(csv_file: str) -> dict:
     Raises:
         FileNotFoundError: If the CSV file cannot be found at the provided path.
         TypeError: If the `csv_file` argument is not a string.
+        ValueError: If the CSV file is empty.
         Warning: Logs a warning if any member has no activities recorded.
     """
 
@@ -130,37 +152,34 @@ def read_presence_data(csv_file: str) -> dict:
         )
         raise TypeError()
 
-    # Try to read the CSV file into a pandas DataFrame
-    try:
-        csv_data = pd.read_csv(csv_file, header=None)
-    except FileNotFoundError:
-        logging.error(f"Error: CSV file '{csv_file}' not found.")
-        raise  # Re-raise the exception after logging the error
+    # Read the CSV file into a list of rows
+    cells = read_csv_rows(csv_file)
+    activity_names = cells[0]
 
     presence_data = {}
 
     # Iterate over rows starting from the second row (index 1) to read member data
-    for row in range(1, len(csv_data)):
-        member_name = csv_data.iloc[
-            row, 0
-        ]  # First column contains the name of the member
+    for row in range(1, len(cells)):
+        member_name = cells[row][0]  # First column contains the name of the member
 
-        if pd.isna(member_name):
-            logging.warning(f"Skipping row {row + 1}: No member name found.")
+        if not member_name:
+            logging.warning("Skipping row %s: No member name found.", row + 1)
             continue  # Skip rows with no member name
 
         # Initialize a list to store activities for this member
         activities = []
 
         # Iterate over the columns starting from the second column (index 1)
-        for col in range(1, csv_data.shape[1]):
-            # Check if the member is present for the activity (non-null value)
-            if pd.notna(csv_data.iloc[row, col]):
+        member_row = cells[row]
+        for col in range(1, len(activity_names)):
+            # Check if the member is present for the activity (non-empty value)
+            if member_row[col]:
                 # Append the activity name (from the first row) in lowercase
-                activity_name = csv_data.iloc[0, col]
-                if pd.isna(activity_name):
+                activity_name = activity_names[col]
+                if not activity_name:
                     logging.error(
-                        f"Skipping column {col + 1}: No activity name found in the header."
+                        "Skipping column %s: No activity name found in the header.",
+                        col + 1,
                     )
                     continue
                 activities.append(activity_name.lower())
@@ -1,11 +1,15 @@
 import logging
 
-from datetime import date, datetime
-from dataclasses import dataclass
+from copy import copy
+from datetime import date
+from dataclasses import dataclass, field
 from typing import Optional
 
+# Alias of date, for annotating fields that are themselves named "date"
+Date = date
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Address:
     street: str
     streetnumber: int
@@ -13,32 +17,28 @@ class Address:
     city: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Agency:
     name: str
     KBO_number: Optional[int]  # Allow None for KBO_number
     address: Address
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Person:
     last_name: str
     first_name: str
     national_register_number: str
     address: Address
+    # Full name in the format "First Last", set once after initialisation
+    full_name: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def full_name(self) -> str:
-        """
-        Returns the full name of the person by concatenating the first and last names.
-
-        Returns:
-            str: The full name in the format "First Last".
-        """
-        return f"{self.first_name} {self.last_name}"
+    def __post_init__(self):
+        # Frozen dataclass: bypass the generated __setattr__
+        object.__setattr__(self, "full_name", f"{self.first_name} {self.last_name}")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Member(Person):
     date_of_birth: date
     registration_year: int
@@ -56,17 +56,44 @@ class Activity:
         self.end_date = end_date
         if start_date > end_date:
             logging.warning(
-                f"Activity: start date {start_date} is after end date {end_date}."
+                "Activity: start date %s is after end date %s.", start_date, end_date
             )
         self.number_of_days = (end_date - start_date).days + 1
-        self.price_per_day = round(total_price / float(self.number_of_days), 2)
         if total_price < 0:
-            logging.warning(f"Activity: total price {total_price} is negative.")
+            logging.warning("Activity: total price %s is negative.", total_price)
+        # Prices are stored in whole cents to avoid floating point drift
         self.total_price = total_price
 
+    @property
+    def total_price(self) -> float:
+        return self._total_cents / 100
+
+    @total_price.setter
+    def total_price(self, total_price: float):
+        self._total_cents = round(total_price * 100)
+        # Per-day price in cents, rounded half up
+        self._price_per_day_cents = (2 * self._total_cents + self.number_of_days) // (
+            2 * self.number_of_days
+        )
+
+    @property
+    def total_cents(self) -> int:
+        return self._total_cents
+
+    @property
+    def price_per_day(self) -> float:
+        return self._price_per_day_cents / 100
+
+    def clone(self) -> "Activity":
+        """
+        Returns a copy of the activity, to adapt it to a member without changing the original.
+        All attributes are immutable, so a shallow copy suffices and is much cheaper than deepcopy.
+        """
+        return copy(self)
+
     def recalculate_price_and_days(self):
         self.number_of_days = (self.end_date - self.start_date).days + 1
-        self.total_price = self.price_per_day * self.number_of_days
+        self._total_cents = self._price_per_day_cents * self.number_of_days
 
     def __str__(self):
         return (
@@ -79,29 +106,33 @@ class Activity:
 class Activities:
     def __init__(self) -> None:
         self.list = []
-        self.total = 0.0
+        self._total_cents = 0
+
+    @property
+    def total(self) -> float:
+        return self._total_cents / 100
 
     def add_activity(self, activity: Activity):
         self.list.append(activity)
-        self.total += activity.total_price
+        self._total_cents += activity.total_cents
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Signature:
     place: str
     name: str
     role: str
-    date: datetime = datetime.today().date()  # Default value for date
+    date: Date = field(default_factory=date.today)  # Defaults to the current date
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TaxCertificateTemplate:
     youth_movement: Agency
     certification_agency: Agency
     signature: Signature
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TaxCertificate:
     serial_number: int
     parent: Person
@@ -1,14 +1,59 @@
+import hashlib
 import logging
-from docx import Document
-from docx2pdf import convert as convert_to_pdf
+import orjson
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from io import BytesIO
+from pathlib import Path
+
+from docx import Document
 
-from config import load_config, read_tax_certificate_template_data
+from config import (
+    TEMPLATE_DOCUMENT_CACHE_DIRECTORY,
+    TEMPLATE_DOCUMENT_CACHE_VERSION,
+    load_config,
+    read_cached_tax_certificate_template_data,
+)
 from data_classes import *
 from word_export import write_tax_certificate_template, write_tax_certificate
 import test_data
 
 
+def cache_tax_certificate_template(template_file_name: str, cached_file_name: str):
+    """
+    Stores a generated tax certificate template in the cache, replacing any template cached
+    before. The signature date is part of the cache key, so older templates are never used again.
+
+    The file is written under a temporary name first, so an interrupted copy never leaves a
+    truncated template behind. A cache that can't be written only logs a warning.
+
+    Args:
+        template_file_name (str): The path of the generated tax certificate template.
+        cached_file_name (str): The path in the cache where the template is stored.
+    """
+    cache_directory = os.path.dirname(cached_file_name)
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        for old_file_name in os.listdir(cache_directory):
+            os.remove(os.path.join(cache_directory, old_file_name))
+
+        file_descriptor, temporary_file_name = tempfile.mkstemp(dir=cache_directory)
+        os.close(file_descriptor)
+        try:
+            shutil.copyfile(template_file_name, temporary_file_name)
+            os.replace(temporary_file_name, cached_file_name)
+        except OSError:
+            os.remove(temporary_file_name)
+            raise
+    except OSError as e:
+        logging.warning("Could not cache tax certificate template: %s", e)
+
+
 def generate_tax_certificate_template(
     file_name: str, template_info: TaxCertificateTemplate
 ) -> str:
@@ -16,6 +61,10 @@ def generate_tax_certificate_template(
     Generates a tax certificate template by populating the provided Word document template
     with information from the `TaxCertificateTemplate` object.
 
+    Generated templates are cached, keyed by a hash of the source template, the template
+    information and `TEMPLATE_DOCUMENT_CACHE_VERSION`, so a later run with the same inputs
+    copies the cached file instead of writing the template again.
+
     Args:
         file_name (str): The path to the Word (.docx) template file to be populated.
         template_info (TaxCertificateTemplate): The data structure containing the tax certificate
@@ -37,23 +86,36 @@ def generate_tax_certificate_template(
                 f"Tax Certificate template '{file_name}' not found."
             )
 
+        # Generate the output file name
+        template_path = Path(file_name)
+        template_file_name = str(
+            template_path.with_stem(
+                f"{template_path.stem} {template_info.youth_movement.name}"
+            )
+        )
+
+        # Reuse the template generated by a previous run with the same inputs
+        template_hash = hashlib.sha256(template_path.read_bytes())
+        template_hash.update(orjson.dumps(asdict(template_info)))
+        template_hash.update(str(TEMPLATE_DOCUMENT_CACHE_VERSION).encode())
+        cached_file_name = os.path.join(
+            TEMPLATE_DOCUMENT_CACHE_DIRECTORY, f"{template_hash.hexdigest()}.docx"
+        )
+        if os.path.exists(cached_file_name):
+            logging.debug("Using cached tax certificate template %s", cached_file_name)
+            shutil.copyfile(cached_file_name, template_file_name)
+            return template_file_name
+
         # Open the document
         doc: Document = Document(file_name)
 
         # Populate the document with template information
         write_tax_certificate_template(doc, template_info)
 
-        # Generate the output file name
-        template_file_name = (
-            file_name.split(".")[0]
-            + " "
-            + template_info.youth_movement.name
-            + "."
-            + file_name.split(".")[1]
-        )
-
         # Save the populated document
         doc.save(template_file_name)
+
+        cache_tax_certificate_template(template_file_name, cached_file_name)
         return template_file_name
 
     except FileNotFoundError as e:
@@ -62,15 +124,115 @@ def generate_tax_certificate_template(
 
     except OSError as e:
         logging.critical(
-            f"Error while handling the document '{file_name}': {e.strerror}"
+            "Error while handling the document '%s': %s", file_name, e.strerror
         )
         raise
 
     except Exception as e:
-        logging.critical(f"Unexpected error occurred: {e}")
+        logging.critical("Unexpected error occurred: %s", e)
         raise
 
 
+# Word's wdFormatPDF file format, for saving documents as PDF over COM
+WORD_FORMAT_PDF = 17
+
+# Template bytes shared with every worker process, set by init_certificate_worker
+template_bytes: bytes = b""
+
+
+def init_certificate_worker(shared_template_bytes: bytes) -> None:
+    """
+    Initializes a worker process with the template document, so it is only sent once per worker.
+
+    Args:
+        shared_template_bytes (bytes): The contents of the tax certificate template (.docx) file.
+    """
+    global template_bytes
+    template_bytes = shared_template_bytes
+
+
+def render_tax_certificate(tax_certificate: TaxCertificate, file_name: str) -> str:
+    """
+    Writes a tax certificate to a copy of the template and saves it as a Word document.
+
+    Args:
+        tax_certificate (TaxCertificate): The tax certificate data to write.
+        file_name (str): The path where the Word (.docx) document is saved.
+
+    Returns:
+        str: The file name of the saved Word document.
+    """
+    document = Document(BytesIO(template_bytes))
+    write_tax_certificate(document, tax_certificate)
+    document.save(file_name)
+    return file_name
+
+
+def convert_tax_certificates_to_pdf(file_names: list, output_directory: str) -> None:
+    """
+    Converts Word documents to PDF files in a single batch, so the office application
+    only has to start once.
+
+    LibreOffice (soffice) is used in headless mode when it is available. Otherwise the
+    documents are converted with Microsoft Word: on Windows through a single Word instance
+    driven over COM, elsewhere through docx2pdf.
+
+    Args:
+        file_names (list): Paths of the Word (.docx) documents to convert.
+        output_directory (str): Directory where the PDF files are saved.
+
+    Raises:
+        subprocess.CalledProcessError: If LibreOffice fails to convert the documents.
+        pywintypes.com_error: If Word fails to open or convert a document (Windows).
+    """
+    soffice = shutil.which("soffice")
+    if soffice is not None:
+        # A private profile, so a running LibreOffice instance can't take over the conversion
+        with tempfile.TemporaryDirectory() as profile_directory:
+            subprocess.run(
+                [
+                    soffice,
+                    f"-env:UserInstallation={Path(profile_directory).as_uri()}",
+                    "--headless",
+                    "--convert-to",
+                    "pdf",
+                    "--outdir",
+                    output_directory,
+                ]
+                + list(file_names),
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+        return
+
+    if sys.platform == "win32":
+        import win32com.client
+
+        # A private Word instance, opened once for all documents
+        word = win32com.client.DispatchEx("Word.Application")
+        word.Visible = False
+        try:
+            for file_name in file_names:
+                pdf_file_name = os.path.join(
+                    output_directory, Path(file_name).with_suffix(".pdf").name
+                )
+                document = word.Documents.Open(os.path.abspath(file_name))
+                try:
+                    document.SaveAs(
+                        os.path.abspath(pdf_file_name), FileFormat=WORD_FORMAT_PDF
+                    )
+                finally:
+                    document.Close(False)
+        finally:
+            word.Quit()
+        return
+
+    # Imported here: docx2pdf starts up Word when it is imported
+    from docx2pdf import convert as convert_to_pdf
+
+    convert_to_pdf(output_directory)
+
+
 def generate_tax_certificates():
     """
     Generates tax certificates for members based on user configuration, activity data,
@@ -89,7 +251,7 @@ def generate_tax_certificates():
         logging.info("Generating tax certificate template file.")
         template_file_name = generate_tax_certificate_template(
             user_config["tax_certificate"]["template_file_name"],
-            read_tax_certificate_template_data(user_config),
+            read_cached_tax_certificate_template_data(user_config),
         )
 
         calendar_year = user_config["organisation"]["calendar_year"]
@@ -113,44 +275,71 @@ def generate_tax_certificates():
             + user_config["tax_certificate"]["next_serial_number"]
         )
         logging.info(
-            f"Starting certificate generation with serial number {serial_number}."
+            "Starting certificate generation with serial number %s.", serial_number
         )
 
+        output_directory = Path.cwd() / "attesten"
+        output_directory.mkdir(exist_ok=True)
+
+        tax_certificates = []
+        file_names = []
         for presence_data in presence_data_array:
             member = presence_data["member"]
             parent = presence_data["parent"]
             all_activities = presence_data["activities"]
 
             ### I. Write data to Tax Certificate template
-            tax_certificate = TaxCertificate(
-                serial_number, parent, member, all_activities
+            tax_certificates.append(
+                TaxCertificate(serial_number, parent, member, all_activities)
             )
-            document = Document(template_file_name)
-            write_tax_certificate(document, tax_certificate)
+            file_names.append(str(output_directory / f"{member.full_name}.docx"))
+            serial_number += 1
 
-            file_name = os.path.join(
-                os.getcwd(),
-                "attesten",
-                f"{member.full_name}.docx",
-            )
+        # Read the template once; every certificate is opened from these bytes
+        with open(template_file_name, "rb") as template_file:
+            shared_template_bytes = template_file.read()
 
-            document.save(file_name)
-            convert_to_pdf(file_name)
-            os.remove(file_name)
+        # Certificates are independent of each other, so they are written in parallel
+        with ProcessPoolExecutor(
+            initializer=init_certificate_worker, initargs=(shared_template_bytes,)
+        ) as executor:
+            docx_file_names = list(
+                executor.map(render_tax_certificate, tax_certificates, file_names)
+            )
+        for tax_certificate in tax_certificates:
+            logging.info(
+                "Tax certificate generation complete for %s.",
+                tax_certificate.member.full_name,
+            )
 
-            logging.info(f"Tax certificate generation complete for {member.full_name}.")
-            serial_number += 1
-            break
+        # Convert all certificates in one go
+        logging.info("Converting %s tax certificates to pdf.", len(docx_file_names))
+        convert_tax_certificates_to_pdf(docx_file_names, str(output_directory))
+
+        # Only remove Word documents that were converted, the converter doesn't always fail loudly
+        missing_pdf_file_names = []
+        for file_name in docx_file_names:
+            pdf_file_name = output_directory / Path(file_name).with_suffix(".pdf").name
+            if pdf_file_name.exists():
+                os.remove(file_name)
+            else:
+                missing_pdf_file_names.append(str(pdf_file_name))
+        if missing_pdf_file_names:
+            error_msg = "Tax certificates not converted to pdf: " + ", ".join(
+                missing_pdf_file_names
+            )
+            logging.error(error_msg)
+            raise RuntimeError(error_msg)
 
     except KeyError as e:
-        logging.error(f"Missing configuration key: {e}")
+        logging.error("Missing configuration key: %s", e)
         raise
 
     except FileNotFoundError as e:
         exit(-1)
 
     except Exception as e:
-        logging.error(f"An unexpected error occurred: {str(e)}")
+        logging.error("An unexpected error occurred: %s", e)
         raise
 
 
@@ -174,10 +363,16 @@ class ColorFormatter(logging.Formatter):
         logging.CRITICAL: MAGENTA,
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Color prefix and reset suffix per level, looked up once per record
+        self._wrap = {
+            level: (color, self.RESET) for level, color in self.COLORS.items()
+        }
+
     def format(self, record):
-        color = self.COLORS.get(record.levelno, self.RESET)
-        message = super().format(record)
-        return f"{color}{message}{self.RESET}"
+        prefix, suffix = self._wrap.get(record.levelno, ("", ""))
+        return prefix + super().format(record) + suffix
 
 
 # Set up the logger
@@ -196,4 +391,5 @@ ch.setFormatter(formatter)
 # Add the console handler to the logger
 logger.addHandler(ch)
 
-generate_tax_certificates()
+if __name__ == "__main__":
+    generate_tax_certificates()
@@ -1,26 +1,104 @@
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Pt, RGBColor
+from docx.text.run import Run
+from copy import deepcopy
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from data_classes import Activity, Member
 import logging
 
+ONE_DAY = timedelta(days=1)
+
+# Character styles for labels and written values, added to the template by add_run_styles
+LABEL_STYLE = "FA_Label"
+WRITTEN_STYLE = "FA_Written"
+
+# Run properties (<w:rPr>) for new runs: only a reference to the character style.
+# Built once and copied into new runs.
+LABEL_RUN_PROPERTIES = parse_xml(
+    f"<w:rPr {nsdecls('w')}>" f'<w:rStyle w:val="{LABEL_STYLE}"/>' "</w:rPr>"
+)
+WRITTEN_RUN_PROPERTIES = parse_xml(
+    f"<w:rPr {nsdecls('w')}>" f'<w:rStyle w:val="{WRITTEN_STYLE}"/>' "</w:rPr>"
+)
+
+
+def add_run_styles(docx_file):
+    """
+    Adds the label and written character styles to a document, unless it already has them.
+    Label text is Arial 11pt, written text is also italic and blue.
+
+    Args:
+        docx_file (Document): The document to add the styles to.
+    """
+    styles = docx_file.styles
+    for style_name, is_written in ((LABEL_STYLE, False), (WRITTEN_STYLE, True)):
+        if style_name in styles:
+            continue
+        style = styles.add_style(style_name, WD_STYLE_TYPE.CHARACTER)
+        style.font.name = "Arial"
+        style.font.size = Pt(11)
+        if is_written:
+            style.font.italic = True
+            style.font.color.rgb = RGBColor(0, 0, 255)
+
 
 def set_label_font_of_run(run):
+    if run._r.rPr is None:
+        run._r.insert(0, deepcopy(LABEL_RUN_PROPERTIES))
+        return
+    # Runs from the template can have other properties, which must be kept
     run.font.name = "Arial"
     run.font.size = Pt(11)
 
 
 def set_written_font_of_run(run):
-    set_label_font_of_run(run)
+    if run._r.rPr is None:
+        run._r.insert(0, deepcopy(WRITTEN_RUN_PROPERTIES))
+        return
+    # Runs from the template can have other properties, which must be kept
+    run.font.name = "Arial"
+    run.font.size = Pt(11)
     run.font.color.rgb = RGBColor(0, 0, 255)
     run.italic = True
 
 
-def add_trailing_spaces(string, total_length):
-    if len(string) >= total_length:
-        return string  # Return the original string if its length is already greater than or equal to the desired length
+def build_run(text: str, is_written: bool):
+    """
+    Builds a formatted `<w:r>` element, detached from any document.
+
+    Args:
+        text (str): The text of the run.
+        is_written (bool): Whether the run gets the written font instead of the label font.
+
+    Returns:
+        CT_R: The run element.
+    """
+    element = OxmlElement("w:r")
+    run = Run(element, None)
+    run.text = text
+    if is_written:
+        set_written_font_of_run(run)
     else:
-        spaces_to_add = total_length - len(string)
-        return string + " " * spaces_to_add
+        set_label_font_of_run(run)
+    return element
+
+
+def append_runs(paragraph, runs: list):
+    """
+    Appends runs to a paragraph in a single pass.
+
+    The `<w:r>` elements are built and formatted detached from the document and then
+    appended to the paragraph together, instead of inserting and formatting them one by one.
+
+    Args:
+        paragraph (Paragraph): The paragraph to append the runs to.
+        runs (list): (text, is_written) pairs; written runs get the written font,
+                     the others the label font.
+    """
+    paragraph._p.extend([build_run(text, is_written) for text, is_written in runs])
 
 
 def determine_age_group(age_group_data: dict, registration_year: int):
@@ -30,20 +108,22 @@ def determine_age_group(age_group_data: dict, registration_year: int):
     return None
 
 
-def is_member_too_old(date_of_birth: date, reference_date: date, max_age):
-    # Calculate age in years
-    age = (
-        reference_date.year
-        - date_of_birth.year
-        - (
-            (reference_date.month, reference_date.day)
-            < (date_of_birth.month, date_of_birth.day)
-        )
-    )
-    # If member is older then max_age -> return False
-    return age >= max_age
+@lru_cache(maxsize=1024)  # Called for every activity of the same member
+def get_age_limit_date(date_of_birth: date, max_age: int) -> date:
+    """
+    Returns the date on which a member born on `date_of_birth` turns `max_age`.
+    A member is too old for an activity from this date on: on a reference date, the member
+    is too old once their age in years, counting only past birthdays, is at least `max_age`.
+    Eligibility checks therefore become plain date comparisons.
+    """
+    try:
+        return date_of_birth.replace(year=date_of_birth.year + max_age)
+    except ValueError:
+        # Born on 29 February and the birthday falls in a non-leap year
+        return date(date_of_birth.year + max_age, 3, 1)
 
 
+@lru_cache(maxsize=256)  # Activities often share the same dates
 def parse_date(date_string: str) -> date:
     """Converts a date string in the format 'Day, DD/MM/YYYY' to a date object."""
     if date_string:
@@ -72,28 +152,32 @@ def adapt_activity_data_to_member(
         max_age (int): The maximum age a member can be to participate in the activity.
 
     Returns:
-        Activity: The modified activity object if the member is eligible.
+        Activity: An adapted copy of the activity if the member is eligible; the given
+                  activity is left unchanged.
         None: If the member is too old for the activity at any point.
 
     Raises:
         ValueError: If there are issues with date manipulation or invalid data is provided.
     """
     try:
+        # The member is too old for any day on or after this date
+        age_limit_date = get_age_limit_date(member.date_of_birth, max_age)
+
         # Check if the member isn't too old at the start of the activity
-        if is_member_too_old(member.date_of_birth, activity.start_date, max_age):
+        if activity.start_date >= age_limit_date:
             return None
 
+        # Activities are shared by all members of an age group, so adapt a copy
+        activity = activity.clone()
+
         # Apply discount if the member qualifies (e.g., Scouting op Maat)
         if member.discount:
-            activity.total_price = round(activity.total_price / 3.0, 2)
+            activity.total_price = activity.total_price / 3  # Rounded to whole cents
 
         # Check if the member becomes too old during the activity
-        if is_member_too_old(member.date_of_birth, activity.end_date, max_age):
-            activity.end_date = date(
-                activity.end_date.year,
-                member.date_of_birth.month,
-                member.date_of_birth.day - 1,
-            )
+        if activity.end_date >= age_limit_date:
+            # Last day before the member turns max_age, also valid for birthdays on the 1st
+            activity.end_date = age_limit_date - ONE_DAY
             activity.recalculate_price_and_days()
 
         return activity
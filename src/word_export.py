@@ -1,61 +1,68 @@
+import logging
+
 from docx import document
+from docx.shared import Cm
 from docx.table import _Cell
 
 from utils import *
 from data_classes import *
 
+# Tab stops that line up the fields following a free-length value
+STREETNUMBER_TAB_STOP = Cm(14.5)
+CITY_TAB_STOP = Cm(6)
+SIGNATURE_DATE_TAB_STOP = Cm(7)
+
 
 def write_kbo_number(page: _Cell, paragraph_index: int, kbo_number):
     if kbo_number is None:
         return
-    page.paragraphs[paragraph_index].clear()
+    paragraph = page.paragraphs[paragraph_index]
+    paragraph.clear()
 
     # Agency KBO number
-    set_label_font_of_run(
-        page.paragraphs[paragraph_index].add_run("KBO nr. (facultatief): ")
+    append_runs(
+        paragraph, [("KBO nr. (facultatief): ", False), (str(kbo_number), True)]
     )
-    if not kbo_number is None:
-        set_written_font_of_run(
-            page.paragraphs[paragraph_index].add_run(str(kbo_number))
-        )
-    else:
-        set_written_font_of_run(page.paragraphs[paragraph_index].add_run(" / "))
 
 
 def write_address(page: _Cell, paragraph_index: int, address: Address):
-    page.paragraphs[paragraph_index].clear()
-
-    # Street
-    set_label_font_of_run(page.paragraphs[paragraph_index].add_run("Straat: "))
-    set_written_font_of_run(
-        page.paragraphs[paragraph_index].add_run(address.street.ljust(100, " "))
-    )
-
-    # Streetnumber
-    set_label_font_of_run(page.paragraphs[paragraph_index].add_run("Nr.: "))
-    set_written_font_of_run(
-        page.paragraphs[paragraph_index].add_run(str(address.streetnumber))
+    paragraphs = page.paragraphs
+    first_paragraph = paragraphs[paragraph_index]
+    second_paragraph = paragraphs[paragraph_index + 1]
+
+    # Street and streetnumber
+    first_paragraph.clear()
+    first_paragraph.paragraph_format.tab_stops.add_tab_stop(STREETNUMBER_TAB_STOP)
+    append_runs(
+        first_paragraph,
+        [
+            ("Straat: ", False),
+            (address.street, True),
+            ("\tNr.: ", False),
+            (str(address.streetnumber), True),
+        ],
     )
-    page.paragraphs[paragraph_index + 1].clear()
 
-    # Zipcode
-    set_label_font_of_run(page.paragraphs[paragraph_index + 1].add_run("Postcode: "))
-    set_written_font_of_run(
-        page.paragraphs[paragraph_index + 1].add_run(
-            str(address.zipcode).ljust(20, " ")
-        )
+    # Zipcode and city
+    second_paragraph.clear()
+    second_paragraph.paragraph_format.tab_stops.add_tab_stop(CITY_TAB_STOP)
+    append_runs(
+        second_paragraph,
+        [
+            ("Postcode: ", False),
+            (str(address.zipcode), True),
+            ("\tGemeente: ", False),
+            (address.city, True),
+        ],
     )
 
-    # City
-    set_label_font_of_run(page.paragraphs[paragraph_index + 1].add_run("Gemeente: "))
-    set_written_font_of_run(page.paragraphs[paragraph_index + 1].add_run(address.city))
-
 
 def write_youth_movement(page: _Cell, youth_movement: Agency):
     # Youth movement name
-    page.paragraphs[1].runs[6].text = youth_movement.name
-    set_written_font_of_run(page.paragraphs[1].runs[6])
-    page.paragraphs[1].runs[7].text = ""
+    name_runs = page.paragraphs[1].runs
+    name_runs[6].text = youth_movement.name
+    set_written_font_of_run(name_runs[6])
+    name_runs[7].text = ""
 
     # Youth movement KBO number
     write_kbo_number(page, 2, youth_movement.KBO_number)
@@ -66,8 +73,9 @@ def write_youth_movement(page: _Cell, youth_movement: Agency):
 
 def write_certification_agency(page: _Cell, certification_agency: Agency):
     # Certification agency name
-    page.paragraphs[17].runs[0].text = "Naam: "
-    set_written_font_of_run(page.paragraphs[17].add_run(certification_agency.name))
+    name_paragraph = page.paragraphs[17]
+    name_paragraph.runs[0].text = "Naam: "
+    set_written_font_of_run(name_paragraph.add_run(certification_agency.name))
 
     # Certification agency KBO number
     write_kbo_number(page, 18, certification_agency.KBO_number)
@@ -79,6 +87,9 @@ def write_certification_agency(page: _Cell, certification_agency: Agency):
 def write_tax_certificate_template(
     docx_file: document, fa_template: TaxCertificateTemplate
 ):
+    # Styles used by the runs written here and in every certificate made from this template
+    add_run_styles(docx_file)
+
     page1 = docx_file.tables[0].rows[1].cells[0]
 
     # Write information about the youth movement (jeugdbeweging) to Tax Certificate Template (Word)
@@ -92,16 +103,19 @@ def write_tax_certificate_template(
 
 
 def write_name(page: _Cell, paragraph_index: int, person: Person):
+    paragraphs = page.paragraphs
+    first_paragraph = paragraphs[paragraph_index]
+    second_paragraph = paragraphs[paragraph_index + 1]
+
     # Last name
-    page.paragraphs[paragraph_index].clear()
-    set_label_font_of_run(page.paragraphs[paragraph_index].add_run("Naam: "))
-    set_written_font_of_run(page.paragraphs[paragraph_index].add_run(person.last_name))
+    first_paragraph.clear()
+    append_runs(first_paragraph, [("Naam: ", False), (person.last_name, True)])
 
     # First name
-    page.paragraphs[paragraph_index + 1].clear()
-    set_label_font_of_run(page.paragraphs[paragraph_index + 1].add_run("Voornaam: "))
-    set_written_font_of_run(
-        page.paragraphs[paragraph_index + 1].add_run(person.first_name)
+    second_paragraph.clear()
+    append_runs(
+        second_paragraph,
+        [("Voornaam: ", False), (person.first_name, True)],
     )
 
 
@@ -109,14 +123,17 @@ def write_national_register_number(
     page: _Cell, paragraph_index: int, national_register_number: str
 ):
     # National Register Number
-    page.paragraphs[paragraph_index].clear()
-    set_label_font_of_run(
-        page.paragraphs[paragraph_index].add_run(
-            "Identificatienummer van het Rijksregister of, in voorkomend geval, het identificatienummer van de KSZ: "
-        )
-    )
-    set_written_font_of_run(
-        page.paragraphs[paragraph_index].add_run(national_register_number)
+    paragraph = page.paragraphs[paragraph_index]
+    paragraph.clear()
+    append_runs(
+        paragraph,
+        [
+            (
+                "Identificatienummer van het Rijksregister of, in voorkomend geval, het identificatienummer van de KSZ: ",
+                False,
+            ),
+            (national_register_number, True),
+        ],
     )
 
 
@@ -143,9 +160,10 @@ def write_member(page: _Cell, member: Member):
     write_national_register_number(page, 16, member.national_register_number)
 
     # Date of birth
-    page.paragraphs[17].runs[0].text = "Geboortedatum: "
-    page.paragraphs[17].runs[1].text = member.date_of_birth.strftime("%d/%m/%Y")
-    set_written_font_of_run(page.paragraphs[17].runs[1])
+    date_of_birth_runs = page.paragraphs[17].runs
+    date_of_birth_runs[0].text = "Geboortedatum: "
+    date_of_birth_runs[1].text = member.date_of_birth.strftime("%d/%m/%Y")
+    set_written_font_of_run(date_of_birth_runs[1])
 
     # Address
     write_address(page, 18, member.address)
@@ -154,36 +172,44 @@ def write_member(page: _Cell, member: Member):
 def write_activities(page: _Cell, activities: Activities):
     # Write information about the activities the member was present at/payed for to Tax Certificate (Word)
     activity_table = page.tables[0]
-    for row_number in range(len(activities.list)):
-        # Single activity
-        activity: Activity = activities.list[row_number]
-        row = activity_table.rows[row_number + 1]
-        set_written_font_of_run(
-            row.cells[1]
-            .paragraphs[0]
-            .add_run(
-                "van    "
-                + activity.start_date.strftime("%d/%m/%Y")
-                + "\nt.e.m. "
-                + activity.end_date.strftime("%d/%m/%Y")
-            )
+    rows = activity_table.rows
+    # Activity rows lie between the header row and the totals row
+    activity_rows = rows[1:-1]
+    column_count = len(activity_table.columns)
+    if len(activities.list) > len(activity_rows):
+        error_msg = (
+            f"{len(activities.list)} activities do not fit in the "
+            f"{len(activity_rows)} activity rows of the tax certificate."
         )
-        set_written_font_of_run(
-            row.cells[2].paragraphs[0].add_run(str(activity.number_of_days))
-        )
-        set_written_font_of_run(
-            row.cells[3].paragraphs[0].add_run("€ " + str(activity.price_per_day))
-        )
-        set_written_font_of_run(
-            row.cells[4].paragraphs[0].add_run("€ " + str(activity.total_price))
+        logging.error(error_msg)
+        raise ValueError(error_msg)
+
+    # Single activity per row
+    for activity, row in zip(activities.list, activity_rows):
+        # The <w:tc> elements are filled directly instead of going through row.cells,
+        # which resolves the table grid on every access. This needs one element per column.
+        cells = row._tr.tc_lst
+        if len(cells) != column_count:
+            error_msg = (
+                "Activity rows of the tax certificate must not have merged cells."
+            )
+            logging.error(error_msg)
+            raise ValueError(error_msg)
+        cell_texts = (
+            "van    "
+            + activity.start_date.strftime("%d/%m/%Y")
+            + "\nt.e.m. "
+            + activity.end_date.strftime("%d/%m/%Y"),
+            str(activity.number_of_days),
+            "€ " + str(activity.price_per_day),
+            "€ " + str(activity.total_price),
         )
+        for cell, text in zip(cells[1:], cell_texts):
+            cell.p_lst[0].append(build_run(text, True))
 
     # Total payed amount for all activities
     set_written_font_of_run(
-        activity_table.rows[5]
-        .cells[4]
-        .paragraphs[0]
-        .add_run("€ " + str(activities.total))
+        rows[-1].cells[4].paragraphs[0].add_run("€ " + str(activities.total))
     )
 
 
@@ -192,34 +218,39 @@ def write_signature(page: _Cell, signature: Signature):
     # Place and date
     place_and_date_paragraph = page.tables[1].rows[0].cells[1].paragraphs[0]
     place_and_date_paragraph.clear()
-    set_label_font_of_run(place_and_date_paragraph.add_run("Gedaan te "))
-    set_written_font_of_run(
-        place_and_date_paragraph.add_run(signature.place.ljust(30, " "))
+    place_and_date_paragraph.paragraph_format.tab_stops.add_tab_stop(
+        SIGNATURE_DATE_TAB_STOP
     )
-    set_label_font_of_run(place_and_date_paragraph.add_run(", "))
-    set_written_font_of_run(
-        place_and_date_paragraph.add_run(signature.date.strftime("%d / %m / %Y"))
+    append_runs(
+        place_and_date_paragraph,
+        [
+            ("Gedaan te ", False),
+            (signature.place, True),
+            ("\t, ", False),
+            (signature.date.strftime("%d / %m / %Y"), True),
+        ],
     )
 
+    signature_paragraphs = page.tables[2].rows[0].cells[1].paragraphs
+
     # Full name
-    name_paragraph = page.tables[2].rows[0].cells[1].paragraphs[2]
+    name_paragraph = signature_paragraphs[2]
     name_paragraph.clear()
-    set_label_font_of_run(name_paragraph.add_run("Naam: "))
-    set_written_font_of_run(name_paragraph.add_run(signature.name))
+    append_runs(name_paragraph, [("Naam: ", False), (signature.name, True)])
 
     # Role within the organisation
-    role_parapgraph = page.tables[2].rows[0].cells[1].paragraphs[3]
+    role_parapgraph = signature_paragraphs[3]
     role_parapgraph.clear()
-    set_label_font_of_run(role_parapgraph.add_run("Hoedanigheid: "))
-    set_written_font_of_run(role_parapgraph.add_run(signature.role))
+    append_runs(role_parapgraph, [("Hoedanigheid: ", False), (signature.role, True)])
 
 
 def write_tax_certificate(docx_file: document, fiscaal_attest: TaxCertificate):
     page2 = docx_file.tables[1].rows[0].cells[0]
 
     # Serial number
-    page2.paragraphs[2].runs[3].text = " " + str(fiscaal_attest.serial_number)
-    set_written_font_of_run(page2.paragraphs[2].runs[3])
+    serial_number_run = page2.paragraphs[2].runs[3]
+    serial_number_run.text = " " + str(fiscaal_attest.serial_number)
+    set_written_font_of_run(serial_number_run)
 
     # Parent / person who payed
     if not fiscaal_attest.parent is None: